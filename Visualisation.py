@@ -2,12 +2,16 @@
 import plotly
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import seaborn as sns
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 import calendar
+from collections import defaultdict
 from io import BytesIO
 
+# Precision for the reference correlation pass
+CORR_DTYPE = "float64"
+
 # Page Config (must be first Streamlit command)
 st.set_page_config(page_title="Sri Lanka Banks Dashboard", layout="wide")
 
@@ -67,16 +71,60 @@ st.title("Sri Lanka Domestic Banking Units Insights")
 st.markdown("_A Domestic Banking Unit (DBU) is typically be a bank branch or a bank division that conducts operations within the geographical boundaries of Sri Lanka and engages in LKR and residents of Sri Lanka. Tracking assets and liabilities from 1995 to 2025 regulated by Central Bank of Sri Lanka._")
 
 # Load Data
-@st.cache_data
+# cache_resource hands every rerun the same frames without a pickle round-trip; treat them as read-only
+@st.cache_resource
 def load_data():
-    assets = pd.read_csv("assets_data_cleaned.csv")
-    liabilities = pd.read_csv("liabilties_data_cleaned.csv")
-    assets["End of Period"] = pd.to_datetime(assets["End of Period"], errors="coerce")
-    liabilities["End of Period"] = pd.to_datetime(liabilities["End of Period"], errors="coerce")
+    # Every column but the date is a float, so declare it up front and skip per-column type inference
+    csv_dtypes = defaultdict(lambda: "float64", {"End of Period": "str"})
+    assets = pd.read_csv("assets_data_cleaned.csv", dtype=csv_dtypes)
+    liabilities = pd.read_csv("liabilties_data_cleaned.csv", dtype=csv_dtypes)
+    # An explicit format keeps to_datetime on its fast path instead of inferring per value
+    assets["End of Period"] = pd.to_datetime(assets["End of Period"], format="%Y-%m-%d", errors="coerce", cache=True)
+    liabilities["End of Period"] = pd.to_datetime(liabilities["End of Period"], format="%Y-%m-%d", errors="coerce", cache=True)
+    # Sorted DatetimeIndex so period lookups are binary searches rather than full column scans
+    assets = assets.dropna(subset=["End of Period"]).sort_values("End of Period")
+    liabilities = liabilities.dropna(subset=["End of Period"]).sort_values("End of Period")
+    assets = assets.set_index("End of Period", drop=False).rename_axis(None)
+    liabilities = liabilities.set_index("End of Period", drop=False).rename_axis(None)
+    # Calendar columns are derived once here so reruns can use the shared frames without copying
+    for frame in (assets, liabilities):
+        frame['Year'] = frame["End of Period"].dt.year.astype("int16")
+        frame['Month'] = frame["End of Period"].dt.month.astype("int8")
+        # Month labels stored as a categorical over the twelve names; chart order comes from the date-sorted index
+        frame['Month Name'] = pd.Categorical(
+            frame["End of Period"].dt.month_name(),
+            categories=list(calendar.month_name)[1:],
+            ordered=True
+        )
     return assets, liabilities
 
 assets_df, liabilities_df = load_data()
 
+# Cached helpers below take the dataset title and year rather than a frame, so st.cache_data
+# hashes a couple of scalars per rerun instead of a DataFrame, and resolve the data here
+def dataset_frame(dataset_title):
+    return assets_df if dataset_title == "Assets" else liabilities_df
+
+def year_slice(dataset_title, year):
+    # Partial-string lookup on the sorted DatetimeIndex resolves by binary search
+    return dataset_frame(dataset_title).loc[str(year)]
+
+# Column roles depend only on the schema, so cache them keyed on a zero-row frame
+@st.cache_data
+def classify_columns(schema):
+    numeric = schema.select_dtypes(include="number").columns
+    # Financial metrics only, without the derived calendar columns
+    financial = numeric.drop(['Year', 'Month'], errors='ignore')
+    return numeric.tolist(), financial.tolist()
+
+# KPI inputs for every year at once, so switching years is a lookup rather than a fresh reduction
+@st.cache_data
+def yearly_kpis(dataset_title):
+    source = dataset_frame(dataset_title)
+    numeric_cols, _ = classify_columns(source.head(0))
+    by_year = source[numeric_cols].groupby(source.index.year, sort=False)
+    return by_year.sum(), by_year.mean().mean(axis=1)
+
 # Adjust sidebar height dynamically
 st.markdown(
     """
@@ -104,23 +152,23 @@ with st.sidebar:
 
 # Dataset selection
 if dataset_choice == "Assets":
-    df = assets_df.copy()
+    df = assets_df
     dataset_title = "Assets"
 else:
-    df = liabilities_df.copy()
+    df = liabilities_df
     dataset_title = "Liabilities"
 
 filter_col = "End of Period"
 
+# Year choices only change with the dataset, so build the option tuple once per dataset
+@st.cache_data
+def year_options(dataset_title):
+    return tuple(int(year) for year in sorted(dataset_frame(dataset_title).index.year.unique(), reverse=True))
+
 # Sidebar Filter: Select Year Only
 if filter_col in df.columns:
-    df = df.dropna(subset=[filter_col])
-    df['Year'] = df[filter_col].dt.year
-    df['Month'] = df[filter_col].dt.month
-    df['Month Name'] = df[filter_col].dt.month_name()
-
-    selected_year = st.sidebar.selectbox("Select Year ", sorted(df['Year'].unique(), reverse=True))
-    df = df[df['Year'] == selected_year]
+    selected_year = st.sidebar.selectbox("Select Year ", year_options(dataset_title))
+    df = year_slice(dataset_title, selected_year)
 
 st.markdown("---")
 
@@ -129,19 +177,21 @@ with st.sidebar:
     st.markdown("### Export Data")
     export_format = st.radio("Select Export Format", ["CSV", "Excel"])
 
-    def download_df(dataframe, file_format):
+    # Neither the slice nor the file is rebuilt for a repeat export
+    @st.cache_data
+    def download_df(dataset_title, selected_year, file_format):
+        dataframe = year_slice(dataset_title, selected_year)
         if file_format == "CSV":
             csv_buffer = dataframe.to_csv(index=False).encode('utf-8')
             return csv_buffer, "text/csv", f"{dataset_title}_{selected_year}.csv"
         elif file_format == "Excel":
             excel_buffer = BytesIO()
             dataframe.to_excel(excel_buffer, index=False, sheet_name=dataset_title)
-            excel_buffer.seek(0)
-            return excel_buffer, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", f"{dataset_title}_{selected_year}.xlsx"
+            return excel_buffer.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", f"{dataset_title}_{selected_year}.xlsx"
         return None, None, None
 
     if st.button("Export Selected Data"):
-        buffer, mime_type, filename = download_df(df, export_format)
+        buffer, mime_type, filename = download_df(dataset_title, selected_year, export_format)
         if buffer:
             st.download_button(
                 label=f"Download as {export_format}",
@@ -157,12 +207,15 @@ st.subheader(f" {dataset_title} Overview ({selected_year})")
 
 # KPI Calculations
 
-numeric_cols = df.select_dtypes(include="number").columns.tolist()
+numeric_cols, financial_cols = classify_columns(df.head(0))
 
-total_value = df.select_dtypes(include="number").sum().sum()
-average_value = df.select_dtypes(include="number").mean().mean()
-financial_cols = [col for col in numeric_cols if col not in ['Year', 'Month']]
-biggest_contributor = df[financial_cols].sum().idxmax()
+year_totals, year_averages = yearly_kpis(dataset_title)
+column_totals = year_totals.loc[selected_year]
+total_value = column_totals.sum()
+average_value = year_averages.loc[selected_year]
+# Per-category totals shared by the KPI row and the pie/bar breakdowns
+category_totals = column_totals[financial_cols]
+biggest_contributor = category_totals.idxmax()
 
 
 col1, col2, col3 = st.columns(3)
@@ -174,9 +227,10 @@ col3.metric("Primary Contributor", biggest_contributor)
 st.subheader(f"{dataset_title} Summary Overview")
 
 # Prepare Data for the Table
-last_date = df[filter_col].max()
+# df is sorted by End of Period (see load_data), so the first and last rows bound the period
+last_date = df[filter_col].iloc[-1]
 frequency = "Monthly"
-date_range = f"{df[filter_col].min().strftime('%b %Y')} - {df[filter_col].max().strftime('%b %Y')}"
+date_range = f"{df[filter_col].iloc[0].strftime('%b %Y')} - {last_date.strftime('%b %Y')}"
 
 # Initialize values
 last_value_display = "No data"
@@ -184,26 +238,16 @@ delta_text = "No previous data"
 
 if not df.empty and numeric_cols:
     last_value_col = numeric_cols[0]
-    last_value_row = df[df[filter_col] == last_date]
-    if not last_value_row.empty:
-        last_value = last_value_row[last_value_col].values[0]
-
-        # Find previous value
-        previous_date = df[df[filter_col] < last_date][filter_col].max()
-        if pd.notnull(previous_date):
-            prev_value_row = df[df[filter_col] == previous_date]
-            if not prev_value_row.empty:
-                prev_value = prev_value_row[last_value_col].values[0]
-                delta = last_value - prev_value
-                delta_text = f"Rs. {delta:,.2f}"
-            else:
-                delta_text = "No previous data"
-        else:
-            delta_text = "No previous data"
+    values = df[last_value_col]
+    last_value = values.iloc[-1]
+    last_value_display = f"Rs. {last_value:,.2f}"
 
-        last_value_display = f"Rs. {last_value:,.2f}"
-delta_pct = ((last_value - prev_value) / prev_value) * 100 if prev_value != 0 else 0
-delta_text = f"Rs. {delta:,.2f} ({delta_pct:+.2f}%)"
+    # The previous value is the row before the last one
+    if len(values) > 1:
+        prev_value = values.iloc[-2]
+        delta = last_value - prev_value
+        delta_pct = ((last_value - prev_value) / prev_value) * 100 if prev_value != 0 else 0
+        delta_text = f"Rs. {delta:,.2f} ({delta_pct:+.2f}%)"
 
 # Create a summary DataFrame
 summary_df = pd.DataFrame({
@@ -219,121 +263,109 @@ summary_df = pd.DataFrame({
 summary_df.index = [''] * len(summary_df)  
 st.table(summary_df)
 
+# Only rebuilt when the dataset, year or metric selection changes
+@st.cache_data
+def build_trend_figure(dataset_title, selected_year, selected_cols):
+    year_df = year_slice(dataset_title, selected_year)
+    # Build every trace up front and hand them to one Figure instead of melting the frame in px.line.
+    # year_df is already in date order, so the months arrive in calendar order.
+    months = year_df["Month Name"].to_numpy()
+    # Pull all selected metrics out as one 2D block, then slice a column per trace
+    metric_values = year_df[selected_cols].to_numpy()
+    traces = [
+        go.Scatter(x=months, y=metric_values[:, i], mode="lines+markers", name=col)
+        for i, col in enumerate(selected_cols)
+    ]
+    fig = go.Figure(
+        data=traces,
+        layout=dict(
+            title=f"{', '.join(selected_cols)} Over Months - {selected_year}",
+            template="plotly_dark",
+            showlegend=True,
+        ),
+    )
+    fig.update_layout(xaxis_title="Month", yaxis_title="Value", legend_title="Metric")
+    return fig
+
 # Charts Section
 st.subheader(f"Monthly Trends in {dataset_title}")
 
 if numeric_cols:
-    selected_cols = st.multiselect(
-        f"Select one or more {dataset_title} metrics to visualize:",
-        numeric_cols,
-        default=[numeric_cols[0]]
-    )
+    # Batch metric picks so the charts rebuild once per submit rather than per click
+    with st.form("trend_form"):
+        selected_cols = st.multiselect(
+            f"Select one or more {dataset_title} metrics to visualize:",
+            numeric_cols,
+            default=[numeric_cols[0]]
+        )
+        st.form_submit_button("Update Charts")
 
     if selected_cols:
-        fig = px.line(
-            df.sort_values(by="Month"),
-            x="Month Name",
-            y=selected_cols,
-            markers=True,
-            title=f"{', '.join(selected_cols)} Over Months - {selected_year}",
-            template="plotly_dark",
-        )
-        fig.update_layout(xaxis_title="Month", yaxis_title="Value", legend_title="Metric")
-        fig.update_xaxes(categoryorder='array', categoryarray=list(calendar.month_name)[1:])  # Correct month order
+        fig = build_trend_figure(dataset_title, selected_year, selected_cols)
         st.plotly_chart(fig, use_container_width=True)
 
         # Box plot for distribution of selected metric
         if len(selected_cols) == 1:
-            st.plotly_chart(
-                px.box(
-                    df,
-                    y=selected_cols[0],
-                    title=f"{selected_cols[0]} Value Distribution",
-                    template="ggplot2"
-                ),
-                use_container_width=True
+            # A single go.Box trace on the raw array avoids px rebuilding a frame from df
+            fig_box = go.Figure(go.Box(y=df[selected_cols[0]].to_numpy(), name=""))
+            fig_box.update_layout(
+                title=f"{selected_cols[0]} Value Distribution",
+                template="ggplot2",
+                yaxis_title=selected_cols[0]
             )
+            st.plotly_chart(fig_box, use_container_width=True)
 
 else:
     st.warning("No numeric columns available to visualize.")
 
-# Separate Pie Charts for Assets and Liabilities
-st.subheader(f"{dataset_title} Distribution Pie Chart")
-
-if numeric_cols:
-    # Step 1: Exclude unwanted columns
-    excluded_cols = [ 'Year', 'Month', 'Month Name', 'End of Period']
-    pie_cols = [col for col in numeric_cols if col not in excluded_cols]
-
-    if pie_cols:
-        pie_data = df[pie_cols].sum().reset_index()
-        pie_data.columns = ['Category', 'Value']
-
-        if dataset_choice == "Assets":
-            fig_pie_assets = px.pie(
-                pie_data,
-                names='Category',
-                values='Value',
-                title=f"Assets Composition - {selected_year}",
-                template="seaborn",
-                hole=0.4
-            )
-            st.plotly_chart(fig_pie_assets, use_container_width=True)
-
-        elif dataset_choice == "Liabilities":
-            fig_pie_liabilities = px.pie(
-                pie_data,
-                names='Category',
-                values='Value',
-                title=f"Liabilities Composition - {selected_year}",
-                template="seaborn",
-                hole=0.4
-            )
-            st.plotly_chart(fig_pie_liabilities, use_container_width=True)
-    else:
-        st.info("No valid financial data available for Pie Chart.")
-else:
-    st.info("No numeric data available to display Pie Chart.")
-
-# Bar Chart Section
-st.subheader(f" {dataset_title} Comparing Total Values by category")
-
-if numeric_cols:
-    # Step 1: Exclude unwanted columns
-    excluded_cols = [ 'Year', 'Month', 'Month Name', 'End of Period']
-    bar_cols = [col for col in numeric_cols if col not in excluded_cols]
-
-    if bar_cols:
-        bar_data = df[bar_cols].sum().reset_index()
-        bar_data.columns = ['Category', 'Total Value']
-
-        fig_bar = px.bar(
-            bar_data,
-            x='Category',
-            y='Total Value',
-            title=f"{dataset_title} - Category Comparison ({selected_year})",
-            color='Total Value',
-            template="plotly",
-            text_auto=True
-        )
-        fig_bar.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_bar, use_container_width=True)
+# Only the reference column of the correlation matrix is plotted, so
+# correlate every metric against it in a single vectorised NumPy pass.
+# Cached so toggling unrelated widgets reuses the result for the same dataset and year.
+@st.cache_data
+def reference_correlations(dataset_title, selected_year, numeric_cols):
+    year_df = year_slice(dataset_title, selected_year)
+    reference_var = numeric_cols[0]
+    # One contiguous CORR_DTYPE row per metric keeps every reduction on sequential memory
+    values = np.ascontiguousarray(year_df[numeric_cols].to_numpy(dtype=CORR_DTYPE).T)
+    if np.isnan(values).any():
+        # Missing values need pandas' pairwise-complete handling
+        corr_values = year_df[numeric_cols].corrwith(year_df[reference_var]).to_numpy()
     else:
-        st.info("No valid financial data available to display Bar Chart.")
-else:
-    st.info("No numeric data available to display Bar Chart.")
-
-
-# Insights Section
-st.subheader(f"Correlation Insights - Diverging Correlation Bars")
-
-if numeric_cols:
-    corr_matrix = df[numeric_cols].corr()
+        centered = values - values.mean(axis=1, keepdims=True)
+        norms = np.sqrt((centered ** 2).sum(axis=1))
+        # A constant metric centres to rounding noise rather than exact zeros; treat it as
+        # flat so it gets NaN like pandas' corrwith instead of a spurious near-zero value
+        flat = norms <= np.finfo(values.dtype).eps * values.shape[1] * np.abs(values).max(axis=1)
+        norms[flat] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr_values = centered @ centered[0] / (norms * norms[0])
+    return pd.Series(corr_values, index=numeric_cols, name=reference_var).sort_values()
+
+# Breakdown figures are cached on their inputs, so reruns from unrelated widgets skip Plotly Express
+@st.cache_data
+def build_pie_figure(category_totals, dataset_title, selected_year):
+    # go.Pie takes the arrays directly, skipping px's frame introspection
+    fig_pie = go.Figure(go.Pie(labels=category_totals.index.to_numpy(), values=category_totals.to_numpy(), hole=0.4))
+    fig_pie.update_layout(title=f"{dataset_title} Composition - {selected_year}", template="seaborn")
+    return fig_pie
 
-    # Diverging Correlation Bars
-    reference_var = numeric_cols[0]
-    corr_unstacked = corr_matrix[reference_var].sort_values()
+@st.cache_data
+def build_category_bar_figure(category_totals, dataset_title, selected_year):
+    bar_data = pd.DataFrame({'Category': category_totals.index, 'Total Value': category_totals.to_numpy()})
+    fig_bar = px.bar(
+        bar_data,
+        x='Category',
+        y='Total Value',
+        title=f"{dataset_title} - Category Comparison ({selected_year})",
+        color='Total Value',
+        template="plotly",
+        text_auto=True
+    )
+    fig_bar.update_layout(xaxis_tickangle=-45)
+    return fig_bar
 
+@st.cache_data
+def build_correlation_figure(corr_unstacked, reference_var):
     fig3 = px.bar(
         corr_unstacked,
         orientation='h',
@@ -346,10 +378,52 @@ if numeric_cols:
         yaxis_title="Variable",
         margin=dict(l=20, r=20, t=30, b=20)
     )
-    st.plotly_chart(fig3, use_container_width=True)
+    return fig3
 
-else:
-    st.info("No numeric data available for correlation analysis.")
+# Below-the-fold breakdown charts: only the one picked here is built and sent to the browser
+breakdown_view = st.radio(
+    "Breakdown chart",
+    ["Distribution Pie Chart", "Category Comparison", "Correlation Insights"],
+    horizontal=True
+)
+
+# Separate Pie Charts for Assets and Liabilities
+if breakdown_view == "Distribution Pie Chart":
+    st.subheader(f"{dataset_title} Distribution Pie Chart")
+
+    if numeric_cols:
+        if financial_cols:
+            st.plotly_chart(build_pie_figure(category_totals, dataset_title, selected_year), use_container_width=True)
+        else:
+            st.info("No valid financial data available for Pie Chart.")
+    else:
+        st.info("No numeric data available to display Pie Chart.")
+
+# Bar Chart Section
+if breakdown_view == "Category Comparison":
+    st.subheader(f" {dataset_title} Comparing Total Values by category")
+
+    if numeric_cols:
+        if financial_cols:
+            st.plotly_chart(build_category_bar_figure(category_totals, dataset_title, selected_year), use_container_width=True)
+        else:
+            st.info("No valid financial data available to display Bar Chart.")
+    else:
+        st.info("No numeric data available to display Bar Chart.")
+
+
+# Insights Section
+if breakdown_view == "Correlation Insights":
+    st.subheader(f"Correlation Insights - Diverging Correlation Bars")
+
+    if numeric_cols:
+        # Diverging Correlation Bars
+        corr_unstacked = reference_correlations(dataset_title, selected_year, numeric_cols)
+        # The helper picks the reference and names the Series after it
+        st.plotly_chart(build_correlation_figure(corr_unstacked, corr_unstacked.name), use_container_width=True)
+
+    else:
+        st.info("No numeric data available for correlation analysis.")
 
 
 # 📎 Footer